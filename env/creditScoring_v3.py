@@ -1,11 +1,14 @@
 
 from typing import Optional
+import queue
+import threading
 import numpy as np
 import gymnasium as gym
 import pandas as pd
 import torch
+from numba import njit
 from tqdm import tqdm
-from utils.data_prep import load_data as load_train_data
+from utils.data_prep import load_data as load_train_data, load_cached, LOAD_DATA_VERSION
 from scipy.special import expit
 
 """
@@ -20,9 +23,121 @@ epsilon: float = 1  # 0-10
 strat_features = np.array([1, 6, 8]) - 1
 strategic_response = True
 response_method = "Close"  # "GA" or "Close"
+cache_dir = "./data/ProcessedData/cache/"  # processed train/test arrays (.npy)
+test_data_version = 1  # bump when _read_test_data changes its output, so the test cache is rebuilt
+batch_response_device = "cpu"  # device of the batched GA responses in get_window: "cpu" or "cuda"
+
+
+@njit(cache=True, fastmath=True)
+def _ga_response_kernel(x_s, theta_s, cost_s, const_term,
+                        learning_rate, num_steps, epsilon, history):
+    """
+    Projected Adam ascent on f(z) - cost for the strategic features only
+    (same update as torch.optim.Adam with default betas/eps on loss = cost - f(z)).
+    grad = sigmoid'(theta_s^T z_s + const) * theta_s - cost_s * (z_s - x_s) / epsilon
+    Rows of `history` (if any) receive z_s after each step.
+    """
+    beta1, beta2, adam_eps = 0.9, 0.999, 1e-8
+    n = x_s.shape[0]
+    z_s = x_s.copy()
+    # Adam 的一阶/二阶矩（每个 strategic 特征一个）
+    m = np.zeros(n)
+    v = np.zeros(n)
+    for step in range(num_steps):
+        logits = const_term
+        for i in range(n):
+            logits += theta_s[i] * z_s[i]
+        p = 1.0 / (1.0 + np.exp(-logits))
+        dp = p * (1.0 - p)
+        bias_corr1 = 1.0 - beta1 ** (step + 1)
+        bias_corr2 = 1.0 - beta2 ** (step + 1)
+        for i in range(n):
+            g = dp * theta_s[i] - cost_s[i] * (z_s[i] - x_s[i]) / epsilon
+            m[i] = beta1 * m[i] + (1.0 - beta1) * g
+            v[i] = beta2 * v[i] + (1.0 - beta2) * g * g
+            z = z_s[i] + (learning_rate / bias_corr1) * m[i] / (np.sqrt(v[i] / bias_corr2) + adam_eps)
+            # 投影到 [0,1]
+            if z < 0.0:
+                z = 0.0
+            elif z > 1.0:
+                z = 1.0
+            z_s[i] = z
+        if step < history.shape[0]:
+            history[step, :] = z_s
+    return z_s
+
+
+def _ga_step_torch(z_s, x_s, theta_s, const_term, cost_s, m, v, step: int,
+                   learning_rate: float, epsilon: float):
+    """
+    One projected Adam step of _ga_response_kernel in torch (scripted by _get_ga_step_torch).
+    z_s / x_s / m / v: (k,) or (B, k); const_term: () or (B,); step counts from 1.
+    Returns the new (z_s, m, v).
+    """
+    p = torch.sigmoid(z_s @ theta_s + const_term)
+    grad = (p * (1 - p)).unsqueeze(-1) * theta_s - cost_s * (z_s - x_s) / epsilon
+    m = 0.9 * m + 0.1 * grad
+    v = 0.999 * v + 0.001 * grad * grad
+    bias_corr1 = 1.0 - 0.9 ** step
+    bias_corr2 = 1.0 - 0.999 ** step
+    z_s = z_s + (learning_rate / bias_corr1) * m / (torch.sqrt(v / bias_corr2) + 1e-8)
+    return z_s.clamp_(0.0, 1.0), m, v
+
+
+# _ga_step_torch 的 TorchScript 版本，首次 compute_responses 时才编译（import 时编译较慢且会打印警告）
+_ga_step_torch_scripted = None
+
+
+def _get_ga_step_torch():
+    global _ga_step_torch_scripted
+    if _ga_step_torch_scripted is None:
+        _ga_step_torch_scripted = torch.jit.script(_ga_step_torch)
+    return _ga_step_torch_scripted
+
+
+def _plot_z_convergence(call_id: int, strat_features: list, history: np.ndarray):
+    """
+    Save the z trajectory of one GA response. Uses the object-oriented matplotlib API
+    (no pyplot state), so it is safe to call from the background thread.
+    """
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 5))
+    ax = fig.add_subplot()
+    for i, f in enumerate(strat_features):
+        ax.plot(history[:, i], label=f'z[{f}]')
+    ax.set_title(f"z Convergence (call #{call_id})")
+    ax.set_xlabel('Step')
+    ax.set_ylabel('z value')
+    ax.legend()
+    ax.grid(True)
+    fig.tight_layout()
+    fig.savefig(f"./result/last_experiment/z_conv_call_{call_id}.png")
+
+
+def _compile_close_response(strat_features):
+    """
+    Generate the Close response for fixed strat_features: the indices are written into
+    the source, so a call is one copy plus one scalar add per strategic feature (no fancy
+    indexing). The shifts are default arguments d0, d1, ...; rebind them through
+    `__defaults__` when the policy changes instead of generating the function again.
+    """
+    params = "".join(f", d{k}=0.0" for k in range(len(strat_features)))
+    lines = [f"def _close_response(x{params}):", "    out = x.copy()"]
+    for k, i in enumerate(strat_features):
+        lines.append(f"    out[{int(i)}] += d{k}")
+    lines.append("    return out")
+
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    return namespace["_close_response"]
+
 
 class creditScoring_v3(gym.Env):
 
+    # reward[action, label]: +1 if the prediction matches the label, -1 otherwise
+    _REWARD = np.array([[1, -1], [-1, 1]], dtype=np.int8)
+
     def __init__(self,
                  policy_weight=[0.1]*11, 
                  maximum_episode_length: int = 1000000):
@@ -47,7 +162,11 @@ class creditScoring_v3(gym.Env):
 
         # Load the training and test data
         filePath = "./data/GiveMeSomeCredit/cs-training.csv"
-        self.train_x, self.train_y, rawData = load_train_data(filePath, seed=seed)
+        self.train_x, self.train_y = load_cached(
+            cache_dir, "train", ("x", "y"), [filePath],
+            build=lambda: load_train_data(filePath, seed=seed)[:2],
+            params={'seed': seed, 'version': LOAD_DATA_VERSION},
+        )
         self.test_x, self.test_y = self.load_test_data()
 
         # parameter of the real cost function
@@ -57,6 +176,20 @@ class creditScoring_v3(gym.Env):
         # 把 policy_weight 从 list 转成 ndarray
         self.policy_weight = np.asarray(policy_weight, dtype=np.float64)
 
+        # Close 响应的缓存: policy_weight 的字节 -> 位移 -epsilon * theta[strat_features]
+        # (principal 会原地更新 policy_weight，所以按值比较而不是按 id)
+        # 位移同时绑定为 _close_fn 的默认参数，_close_fn 只生成一次
+        self._close_delta = None
+        self._close_delta_key = None
+        self._close_fn = _compile_close_response(strat_features)
+
+        # _get_info 中算好的 next_obs: (next_obs, next_idx, mode, policy_weight 副本)，供下一次 _get_obs 复用
+        self._cached_next_obs = None
+
+        # GA 轨迹图的后台绘制队列（第一次需要时启动线程）
+        self._hist_queue = queue.Queue()
+        self._hist_thread = None
+
         # test
         self.trigger_once = False
     
@@ -71,6 +204,7 @@ class creditScoring_v3(gym.Env):
         Strategic response using gradient ascent to maximize f(z) - cost, updating only strat_features.
         Utility: f(z) = sigmoid(theta^T z_full); cost = 1/(2*epsilon) * |z_s - x_s|^2.
         Only strat_features are optimized; other features and bias stay fixed.
+        Uses projected Adam with the analytic gradient (see _ga_response_kernel).
         """
         # 初始化调用计数
         if not hasattr(self, "_response_call_count"):
@@ -88,72 +222,142 @@ class creditScoring_v3(gym.Env):
         # non-strategic 特征索引
         ns_features = [i for i in range(n_features) if i not in strat_features]
 
-        # 选择设备并转换数据类型
-        device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        x_orig = torch.tensor(real_feature.astype(np.float32), device=device)
-        theta_full = torch.tensor(policy_weight.astype(np.float32), device=device)
         # 分离权重和 bias
-        theta = theta_full[:-1]    # 特征权重
-        bias = theta_full[-1]      # 偏置权重
+        theta = policy_weight[:-1]    # 特征权重
+        bias = policy_weight[-1]      # 偏置权重
 
         # strategic / non-strategic 部分
-        x_s  = x_orig[strat_features]
-        x_ns = x_orig[ns_features]
-        theta_s  = theta[strat_features]
-        theta_ns = theta[ns_features]
-
-        # 成本系数
-        cost_s = torch.tensor(self.cost_weight[strat_features].astype(np.float32), device=device)
+        x_s = np.ascontiguousarray(real_feature[strat_features], dtype=np.float64)
+        theta_s = np.ascontiguousarray(theta[strat_features], dtype=np.float64)
+        cost_s = np.ascontiguousarray(self.cost_weight[strat_features], dtype=np.float64)
 
         # 预计算非-strategic 与 bias 的常量项
-        with torch.no_grad():
-            const_term = torch.dot(theta_ns, x_ns) + bias
-
-        # 需要优化的变量
-        z_s = x_s.clone().detach().requires_grad_(True)
-        optimizer = torch.optim.Adam([z_s], lr=learning_rate)
+        const_term = float(np.dot(theta[ns_features], real_feature[ns_features]) + bias)
 
         # 是否记录轨迹
         record = self._response_call_count in {10, 20, 30, 40, 50}
-        history = []
-
-        # 梯度上升迭代
-        for _ in range(num_steps):
-            optimizer.zero_grad()
-            logits = torch.dot(theta_s, z_s) + const_term
-            fz = torch.sigmoid(logits)
-            # 成本项带 epsilon 调节
-            cost = torch.sum(cost_s * (z_s - x_s) ** 2) / (2 * epsilon)
-            loss = -fz + cost
-            loss.backward()
-            optimizer.step()
+        history = np.empty((num_steps if record else 0, len(x_s)), dtype=np.float64)
 
-            # 投影到 [0,1]
-            with torch.no_grad():
-                z_s.clamp_(0.0, 1.0)
-
-            if record:
-                history.append(z_s.detach().cpu().numpy().copy())
-
-        # 可选可视化
-        if record and history:
-            import matplotlib.pyplot as plt
-            arr = np.stack(history, axis=0)
-            plt.figure(figsize=(10, 5))
-            for i, f in enumerate(strat_features):
-                plt.plot(arr[:, i], label=f'z[{f}]')
-            plt.title(f"z Convergence (call #{self._response_call_count})")
-            plt.xlabel('Step')
-            plt.ylabel('z value')
-            plt.legend()
-            plt.grid(True)
-            plt.tight_layout()
-            plt.savefig(f"./result/last_experiment/z_conv_call_{self._response_call_count}.png")
-            plt.close()
+        # Adam 梯度上升迭代（解析梯度 + 投影到 [0,1]）
+        z_s = _ga_response_kernel(x_s, theta_s, cost_s, const_term,
+                                  learning_rate, num_steps, epsilon, history)
+
+        # 可选可视化（交给后台线程绘制，不阻塞训练循环）
+        if record:
+            self._queue_history(self._response_call_count, list(strat_features), history)
 
         # 合成最终特征向量
         modified = real_feature.copy()
-        modified[strat_features] = z_s.detach().cpu().numpy()
+        modified[strat_features] = z_s
+        return modified
+
+    def _queue_history(self, call_id: int, strat_features: list, history: np.ndarray):
+        if self._hist_thread is None:
+            self._hist_thread = threading.Thread(target=self._drain_history, daemon=True)
+            self._hist_thread.start()
+        self._hist_queue.put((call_id, strat_features, history))
+
+    def _drain_history(self):
+        """Background worker: render queued GA trajectories until the None sentinel arrives."""
+        while True:
+            item = self._hist_queue.get()
+            if item is None:
+                return
+            # 单张图失败（如保存路径不存在）只打印警告，不终止 worker
+            try:
+                _plot_z_convergence(*item)
+            except Exception as e:
+                print(f"Warning: failed to plot z convergence of call #{item[0]}: {e}")
+
+    def close(self):
+        # 等待尚未绘制完的轨迹图
+        if self._hist_thread is not None:
+            self._hist_queue.put(None)
+            self._hist_thread.join()
+            self._hist_thread = None
+        super().close()
+
+    def strategic_response_GA_torch(self,
+                          real_feature: np.ndarray,
+                          policy_weight: np.ndarray,
+                          learning_rate: float = 0.01,
+                          num_steps: int = 20,
+                          epsilon: float = 1.0,
+                          strat_features: Optional[list] = None,
+                          device: Optional[str] = None):
+        """
+        Same response as strategic_response_GA, computed with torch.
+        Uses the analytic gradient with a hand-written Adam step (_ga_step_torch) instead of autograd.
+        Runs on the CPU unless a device is given: for a single sample the transfers cost more than the optimization.
+        """
+        return self.compute_responses(real_feature[np.newaxis, :], policy_weight,
+                                      learning_rate, num_steps, epsilon, strat_features, device)[0]
+
+    def compute_responses(self,
+                          sample_block: np.ndarray,
+                          policy_weight: Optional[np.ndarray] = None,
+                          learning_rate: float = 0.01,
+                          num_steps: int = 20,
+                          epsilon: float = 1.0,
+                          strat_features: Optional[list] = None,
+                          device: Optional[str] = None):
+        """
+        GA responses for a block of samples at once: the strategic parts of all B samples are
+        stacked into one (B, k) tensor and optimized together by _ga_step_torch.
+        Samples are independent, so the result equals strategic_response_GA applied row by row.
+
+        Parameters
+        ----------
+        sample_block : np.ndarray
+            (B, 11) original features of the applicants
+        policy_weight : np.ndarray
+            classifier weights (last dimension is bias); defaults to self.policy_weight
+        device : str
+            torch device to optimize on; defaults to 'cpu'
+        Returns
+        -------
+        modified : np.ndarray
+            (B, 11) responded features
+        """
+        if policy_weight is None:
+            policy_weight = self.policy_weight
+
+        if not strategic_response:
+            return sample_block
+
+        # 默认操纵所有非 bias 特征
+        n_features = len(policy_weight) - 1
+        if strat_features is None:
+            strat_features = list(range(n_features))
+        # non-strategic 特征索引
+        ns_features = [i for i in range(n_features) if i not in strat_features]
+
+        # 转换数据类型；默认留在 CPU，不在热路径上探测 CUDA
+        if device is None:
+            device = 'cpu'
+        x_orig = torch.from_numpy(np.asarray(sample_block, dtype=np.float32)).to(device)
+        theta_full = torch.from_numpy(policy_weight.astype(np.float32)).to(device)
+        theta = theta_full[:-1]    # 特征权重
+        bias = theta_full[-1]      # 偏置权重
+
+        x_s = x_orig[:, strat_features]
+        theta_s = theta[strat_features]
+        cost_s = torch.from_numpy(self.cost_weight[strat_features].astype(np.float32)).to(device)
+
+        # 预计算非-strategic 与 bias 的常量项, shape (B,)
+        const_term = x_orig[:, ns_features] @ theta[ns_features] + bias
+
+        ga_step = _get_ga_step_torch()
+        z_s = x_s.clone()
+        # Adam 的一阶/二阶矩，与 _ga_response_kernel 相同
+        m = torch.zeros_like(z_s)
+        v = torch.zeros_like(z_s)
+        for step in range(1, num_steps + 1):
+            z_s, m, v = ga_step(z_s, x_s, theta_s, const_term, cost_s, m, v, step, learning_rate, epsilon)
+
+        # 合成最终特征向量
+        modified = np.array(sample_block, dtype=np.float64)
+        modified[:, strat_features] = z_s.cpu().numpy()
         return modified
 
     def strategic_response_Close(self, 
@@ -192,8 +396,39 @@ class creditScoring_v3(gym.Env):
 
         return modified
 
+    def _close_shift(self):
+        """
+        Shift -epsilon * theta[strat_features] of the Close response. It is the same for
+        every sample, so it is recomputed (and rebound into _close_fn) only when the value
+        of policy_weight changes.
+        """
+        key = self.policy_weight.tobytes()
+        if key != self._close_delta_key:
+            if strategic_response:
+                self._close_delta = -epsilon * self.policy_weight[:-1][strat_features]
+            else:
+                self._close_delta = np.zeros(len(strat_features))
+            self._close_fn.__defaults__ = tuple(float(d) for d in self._close_delta)
+            self._close_delta_key = key
+        return self._close_delta
+
+    def _close_response_row(self, idx):
+        """Close response of sample idx of the current split (a fresh copy)."""
+        seq_x = self.train_x if self.mode == 'train' else self.test_x
+        self._close_shift()
+        return self._close_fn(seq_x[idx])
+
     def load_test_data(self):
         path = "data/ProcessedData/"
+        return load_cached(
+            cache_dir, "test", ("x", "y"),
+            [path + "cs-test-processed.csv", path + "sampleEntry.csv"],
+            build=self._read_test_data,
+            params={'test_label_threshold': test_label_threshold, 'version': test_data_version},
+        )
+
+    def _read_test_data(self):
+        path = "data/ProcessedData/"
 
         test_data = pd.read_csv(path + "cs-test-processed.csv")
         test_prob = pd.read_csv(path + "sampleEntry.csv")
@@ -218,9 +453,16 @@ class creditScoring_v3(gym.Env):
         
         # response to the sample
         if response_method == "GA":
-            observation = self.strategic_response_GA(sample, self.policy_weight)
+            # 上一步 _get_info 已对同一样本、同一 policy 算过 response 时直接复用
+            cached = self._cached_next_obs
+            self._cached_next_obs = None
+            if (cached is not None and cached[1] == self.samplePointer and cached[2] == self.mode
+                    and np.array_equal(cached[3], self.policy_weight)):
+                observation = cached[0]
+            else:
+                observation = self.strategic_response_GA(sample, self.policy_weight)
         elif response_method == "Close":
-            observation = self.strategic_response_Close(sample, self.policy_weight)
+            observation = self._close_response_row(self.samplePointer)
             if not self.trigger_once:
                 print(f"sample: {sample}, modified: {observation}")
                 self.trigger_once = True
@@ -247,8 +489,9 @@ class creditScoring_v3(gym.Env):
 
             if response_method == "GA":
                 next_obs = self.strategic_response_GA(next_sample, self.policy_weight)
+                self._cached_next_obs = (next_obs, next_idx, self.mode, self.policy_weight.copy())
             elif response_method == "Close":
-                next_obs = self.strategic_response_Close(next_sample, self.policy_weight)
+                next_obs = self._close_response_row(next_idx)
             else:
                 # non-strategic 下直接 None
                 next_obs = None
@@ -276,14 +519,7 @@ class creditScoring_v3(gym.Env):
         # 1) 计算 reward（不动 samplePointer）
         y_seq = self.train_y if self.mode == 'train' else self.test_y
         label = y_seq[self.samplePointer]
-        if action == 0 and label == 0:
-            reward = +1
-        elif action == 0 and label == 1:
-            reward = -1
-        elif action == 1 and label == 0:
-            reward = -1
-        else:  # action == 1 and label == 1
-            reward = +1
+        reward = int(self._REWARD[action, int(label)])
 
         # 2) 更新 policy weight（可选）
         if previous_policy_weight is not None:
@@ -309,10 +545,156 @@ class creditScoring_v3(gym.Env):
 
         return next_obs, reward, terminated, truncated, info
 
+    def get_window(self, start: int, stop: int):
+        """
+        Responses, labels and next observations for samples [start, stop) of the current split,
+        computed in one go instead of one _get_obs/_get_info call per sample.
+
+        Returns:
+            obs: (n, 11) responded observations.
+            true_label: (n,) labels.
+            next_obs: (n, 11) responded observation of the following sample (zeros where there is none).
+            terminated: (n,) True where the sample is the last one of the split.
+        """
+        seq_x = self.train_x if self.mode == 'train' else self.test_x
+        seq_y = self.train_y if self.mode == 'train' else self.test_y
+        max_len = len(seq_x)
+        stop = min(stop, max_len)
+        # 多取一行作为 next_obs
+        stop_next = min(stop + 1, max_len)
+
+        if response_method == "GA":
+            responded = self.compute_responses(seq_x[start:stop_next], device=batch_response_device)
+        elif response_method == "Close":
+            responded = np.array(seq_x[start:stop_next], dtype=np.float64)
+            responded[:, strat_features] += self._close_shift()
+        else:
+            raise ValueError(f"Unknown response method: {response_method}")
+
+        n = stop - start
+        obs = responded[:n]
+        next_obs = np.zeros_like(obs)
+        next_obs[:len(responded) - 1] = responded[1:]
+        terminated = np.arange(start + 1, stop + 1) >= max_len
+
+        return obs, seq_y[start:stop], next_obs, terminated
+
+    def rollout_batch(self, n: int):
+        """
+        Window of the next n samples starting at samplePointer (see get_window), with the episode
+        rules of step(): samples past maximum_episode_length are not served, and the pointer moves
+        past the window only while the episode goes on (otherwise it stays on the last sample,
+        as after a terminal step(); call reset() to start again).
+
+        Returns
+        -------
+        obs, true_label, next_obs, terminated: as in get_window.
+        truncated: (n,) True where step() would report truncation after the sample.
+        """
+        start = self.samplePointer
+        # step() 在 next_idx > maximum_episode_length 时截断，所以最多取到下标 maximum_episode_length
+        stop = min(start + n, self.maximum_episode_length + 1)
+        obs, true_label, next_obs, terminated = self.get_window(start, stop)
+        truncated = np.arange(start + 1, start + len(obs) + 1) > self.maximum_episode_length
+
+        if len(obs) > 0:
+            if terminated[-1] or truncated[-1]:
+                self.samplePointer = start + len(obs) - 1
+            else:
+                self.samplePointer = start + len(obs)
+        return obs, true_label, next_obs, terminated, truncated
+
+class VectorCreditScoring(gym.vector.VectorEnv):
+    """
+    Native vectorized creditScoring_v3: num_envs replicas read interleaved samples
+    (replica i sees samples i, i+num_envs, ...), so one step covers num_envs consecutive samples
+    and is served by a single creditScoring_v3.get_window call.
+    The trailing len % num_envs samples of a split are not visited. There is no autoreset:
+    once terminated/truncated, call reset().
+    """
+
+    metadata = {"autoreset_mode": gym.vector.AutoresetMode.DISABLED}
+
+    def __init__(self,
+                 num_envs: int = 128,
+                 policy_weight=[0.1]*11,
+                 maximum_episode_length: int = 1000000):
+        self.env = creditScoring_v3(policy_weight, maximum_episode_length)
+        self.num_envs = num_envs
+
+        self.single_observation_space = self.env.observation_space
+        self.single_action_space = self.env.action_space
+        self.observation_space = gym.vector.utils.batch_space(self.single_observation_space, num_envs)
+        self.action_space = gym.vector.utils.batch_space(self.single_action_space, num_envs)
+
+        # 当前 window 的起点（replica i 的指针为 window_start + i）
+        self.window_start = 0
+        self._labels = None
+        self._next_obs = None
+        self._terminal = None
+
+    # mode / policy_weight 转发给底层 env，用法与单个 env 相同
+    @property
+    def mode(self):
+        return self.env.mode
+
+    @mode.setter
+    def mode(self, mode):
+        self.env.mode = mode
+
+    @property
+    def policy_weight(self):
+        return self.env.policy_weight
+
+    @policy_weight.setter
+    def policy_weight(self, policy_weight):
+        self.env.policy_weight = policy_weight
+
+    def _load_window(self, start: int):
+        obs, self._labels, self._next_obs, self._terminal = self.env.get_window(start, start + self.num_envs)
+        self.window_start = start
+        return obs
+
+    def _get_info(self):
+        return {
+            'true_label': self._labels,
+            'next_obs': self._next_obs,
+            'terminal': self._terminal,
+        }
+
+    def reset(self, seed: Optional[int] = None, options: Optional[dict] = None):
+        super().reset(seed=seed)
+        obs = self._load_window(0)
+        return obs, self._get_info()
+
+    def step(self, actions, previous_policy_weight=None):
+        actions = np.asarray(actions)
+        labels = self._labels
+        rewards = creditScoring_v3._REWARD[actions, labels]
+
+        if previous_policy_weight is not None:
+            self.policy_weight = previous_policy_weight
+
+        seq_x = self.env.train_x if self.mode == 'train' else self.env.test_x
+        next_start = self.window_start + self.num_envs
+        terminated = np.full(self.num_envs, next_start + self.num_envs > len(seq_x))
+        truncated = np.full(self.num_envs, next_start > self.env.maximum_episode_length)
+
+        # info 描述刚刚被打分的样本
+        info = self._get_info()
+        if not (terminated[0] or truncated[0]):
+            next_obs = self._load_window(next_start)
+        else:
+            next_obs = np.zeros((self.num_envs, self.single_observation_space.shape[0]))
+
+        return next_obs, rewards, terminated, truncated, info
+
 # Register the environment after the class definition
 gym.register(
     id="creditScoring_v3",
-    entry_point="env.creditScoring_v3:creditScoring_v3"
+    entry_point="env.creditScoring_v3:creditScoring_v3",
+    disable_env_checker=True,
+    vector_entry_point="env.creditScoring_v3:VectorCreditScoring"
 )
 
 if __name__ == "__main__":
@@ -396,7 +396,8 @@ class creditScoring_v5(gym.Env):
 # Register the environment after the class definition
 gym.register(
     id="creditScoring_v5",
-    entry_point="env.creditScoring_v5:creditScoring_v5"
+    entry_point="env.creditScoring_v5:creditScoring_v5",
+    disable_env_checker=True
 )
 
 if __name__ == "__main__":
@@ -21,7 +21,8 @@ learning_rate = 1e-2
 # mode = "normalized data + non-strategic response"
 
 def main():
-    env = gym.make("creditScoring_v3")
+    # 直接实例化: gym.make 的 wrapper 会做 observation 检查，且 env.policy_weight / env.mode 赋值不会传到底层 env
+    env = creditScoring_v3()
     agent = Principal_v3(
         env=env,
         learning_rate_actor=learning_rate,
@@ -63,7 +64,7 @@ def main():
     )
 
     # test
-    env_test = gym.make("creditScoring_v3")
+    env_test = creditScoring_v3()
     env_test.mode = 'test'
     obs, info = env_test.reset()
     env_test.policy_weight = agent.previous_policy_weight
@@ -78,6 +79,7 @@ def main():
             # update if the environment is done and the current obs
             done = terminated or truncated
             obs, info = next_obs, info
+    env_test.close()
 
     return agent, env
 
@@ -299,4 +301,5 @@ if __name__ == "__main__":
     training_batch_acc(agent)
     plot_policy_weights_export(agent)
     plot_test_auc(agent)
-    plot_results_accAndRewards_export(agent, env, train_rolling_length, test_rolling_length)
\ No newline at end of file
+    plot_results_accAndRewards_export(agent, env, train_rolling_length, test_rolling_length)
+    env.close()
\ No newline at end of file
@@ -27,7 +27,8 @@ seed = 0 # 0 or 2
 # mode = "normalized data + non-strategic response"
 
 def main():
-    env = gym.make("creditScoring_v5")
+    # 直接实例化: gym.make 的 wrapper 会做 observation 检查，且 env.policy_weight / env.mode 赋值不会传到底层 env
+    env = creditScoring_v5()
     agent = Principal_v5(
         env=env,
         learning_rate_actor=learning_rate,
@@ -69,7 +70,7 @@ def main():
     )
 
     # test
-    env_test = gym.make("creditScoring_v5")
+    env_test = creditScoring_v5()
     env_test.mode = 'test'
     obs, info = env_test.reset()
     env_test.policy_weight = agent.previous_policy_weight
@@ -84,6 +85,7 @@ def main():
             # update if the environment is done and the current obs
             done = terminated or truncated
             obs, info = next_obs, info
+    env_test.close()
 
     return agent, env
 
@@ -458,4 +460,5 @@ if __name__ == "__main__":
         result_dir= "./result/last_experiment",
         use_train = True
     )
+    env.close()
 
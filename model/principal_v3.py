@@ -91,15 +91,16 @@ class Principal_v3:
         np.random.shuffle(batch)
         accs = []  # 本次 batch 的准确率记录
 
+        # Q(s, a) = w_obs^T s + w_act * a; views into q_weights, so the in-place updates below write through
+        w_obs = self.q_weights[:-1]
+        w_act = self.q_weights[-1:]
+
         for obs, action, reward, terminated, next_obs, true_label in batch:
-            # obs_with_bias = np.append(obs, 1.0)
-            q_input = np.append(obs, action)
-            q_value = np.dot(self.q_weights, q_input)
+            q_value = obs.dot(w_obs) + action * w_act[0]
 
             if not terminated and next_obs is not None:
-                # next_obs_with_bias = np.append(next_obs, 1.0)
-                q_next_0 = np.dot(self.q_weights, np.append(next_obs, 0))
-                q_next_1 = np.dot(self.q_weights, np.append(next_obs, 1))
+                q_next_0 = next_obs.dot(w_obs)
+                q_next_1 = q_next_0 + w_act[0]
                 max_q_next = max(q_next_0, q_next_1)
             else:
                 max_q_next = 0.0
@@ -108,7 +109,8 @@ class Principal_v3:
             td_error = td_target - q_value
             td_error = np.clip(td_error, -clipVal_td, +clipVal_td)
 
-            self.q_weights += self.lr_c * td_error * q_input
+            w_obs += (self.lr_c * td_error) * obs
+            w_act += self.lr_c * td_error * action
 
             logits = np.dot(self.previous_policy_weight, obs)
             prob = 1 / (1 + np.exp(-logits))
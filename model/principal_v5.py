@@ -1,6 +1,8 @@
-from collections import deque
+import math
+from typing import Optional
 import gymnasium as gym
 import numpy as np
+from numba import njit
 from scipy.special import expit
 
 """
@@ -14,6 +16,7 @@ default_discount_factor = 0.99
 default_predict_label_threshold = 0.5
 default_batch_size = 128 # 32
 default_init_cost_pram = 2.0
+default_max_steps = 100000 # initial capacity of the training records (grown on demand)
 
 clipVal_td = 10.0 # for clipping the TD error
 clipVal_grad_log_pi = 10.0 # for clipping the gradient of log policy
@@ -21,6 +24,86 @@ clipVal_policyWeight = 10.0 # for clipping the policy weight update
 
 dimension = 2 # number of features
 np.random.seed(0)
+default_seed = 0 # seed of the action-sampling generator
+
+
+def _sigmoid(x: float) -> float:
+    """Scalar sigmoid via math.exp, split by sign so exp never overflows."""
+    if x >= 0:
+        return 1.0 / (1.0 + math.exp(-x))
+    z = math.exp(x)
+    return z / (1.0 + z)
+
+
+def _grow(arr: np.ndarray, min_len: int) -> np.ndarray:
+    """Return arr, or a copy with at least min_len rows (capacity doubled) if it is too short."""
+    if len(arr) >= min_len:
+        return arr
+    grown = np.empty((max(min_len, 2 * len(arr)),) + arr.shape[1:], dtype=arr.dtype)
+    grown[:len(arr)] = arr
+    return grown
+
+
+@njit(cache=True, fastmath=True)
+def _run_batch(obs, act, rew, term, next_obs, labels, q_w, pw,
+               lr_c, lr_a, gamma, clip_td, clip_g, clip_pw, weight_update):
+    """
+    Actor-critic kernel for one batch; see Principal_v5.update_batch.
+    q_w and pw are updated in place, the per-sample policy weight updates are written
+    to weight_update (n, d). Returns the batch expected accuracy.
+    """
+    n, d = obs.shape
+    td = np.empty(n)
+    probs = np.empty(n)
+    acc = 0.0
+
+    # TD error 和 policy 概率都用 batch 开始时的权重
+    for i in range(n):
+        q_value = act[i] * q_w[d]
+        q_next_0 = 0.0
+        logits = 0.0
+        for j in range(d):
+            q_value += obs[i, j] * q_w[j]
+            q_next_0 += next_obs[i, j] * q_w[j]
+            logits += obs[i, j] * pw[j]
+
+        if term[i]:
+            max_q_next = 0.0
+        else:
+            max_q_next = max(q_next_0, q_next_0 + q_w[d])
+
+        td_error = rew[i] + gamma * max_q_next - q_value
+        td[i] = min(max(td_error, -clip_td), clip_td)
+
+        if logits >= 0:
+            prob = 1.0 / (1.0 + np.exp(-logits))
+        else:
+            z = np.exp(logits)
+            prob = z / (1.0 + z)
+        probs[i] = prob
+
+        # 每步正确的概率(expected accuracy)
+        acc += prob if labels[i] == 1 else 1.0 - prob
+
+    # critic: sum of the per-sample steps
+    for i in range(n):
+        step = lr_c * td[i]
+        for j in range(d):
+            q_w[j] += step * obs[i, j]
+        q_w[d] += step * act[i]
+
+    # actor: per-sample clipped updates, averaged over the batch
+    for i in range(n):
+        for j in range(d):
+            grad_log_pi = (act[i] - probs[i]) * obs[i, j]
+            grad_log_pi = min(max(grad_log_pi, -clip_g), clip_g)
+            update = lr_a * td[i] * grad_log_pi / n
+            update = min(max(update, -clip_pw), clip_pw)
+            weight_update[i, j] = update
+            pw[j] += update
+
+    return acc / n
+
 
 # a principal for the credit scoring v1 environment
 class Principal_v5:
@@ -34,11 +117,15 @@ class Principal_v5:
         buffer_size: int = default_batch_size,
         discount_factor: float = 0.99,
         init_cost_pram:  float = 2.0, # same as in the "made practical" paper 
+        max_steps: int = default_max_steps,
+        seed: Optional[int] = default_seed,
     ):
         """Initialize a Reinforcement Learning agent with an empty dictionary
         of state-action values (q_values), a learning rate and an epsilon.
         """
         self.env = env
+        # action sampling RNG
+        self._rng = np.random.default_rng(seed)
         self.discount_factor = discount_factor
         self.lr_a = learning_rate_actor
 
@@ -55,85 +142,165 @@ class Principal_v5:
         self.cost_pram_estimation = np.full(shape=dimension, fill_value=init_cost_pram, dtype=np.float64)
         self.lr_cost = learning_rate_cost
 
-        # buff
+        # buff: 预分配的 SoA ring buffer，write_head 为累计写入次数
         self.buffer_size = buffer_size
-        self.buffer = deque(maxlen=buffer_size)
+        self.buf_obs = np.empty((buffer_size, dimension+1), dtype=np.float64)
+        self.buf_next_obs = np.empty((buffer_size, dimension+1), dtype=np.float64)
+        self.buf_reward = np.empty(buffer_size, dtype=np.float64)
+        # action | terminated << 1 | true_label << 2
+        self.buf_flags = np.empty(buffer_size, dtype=np.uint8)
+        self.write_head = 0
+        self.buffer_len = 0
 
         # record training and testing process
         self.batch_update_count = 0
-        self.training_error = []
-        self.training_expected_acc_list = []
-        self.training_acc_detail = []
-        self.training_rewards = []
-        self.training_policy_weights = []
-        self.training_single_policy_weight_update = []
+        # 每步记录: 预分配数组 + 写指针 _t，容量不够时翻倍 (见 training_* 属性)
+        self._t = 0
+        self._prob = np.empty(max_steps, dtype=np.float64)
+        self._pred = np.empty(max_steps, dtype=np.int8)
+        self._label = np.empty(max_steps, dtype=np.float64)
+        self._rew = np.empty(max_steps, dtype=np.float64)
+        self._pw_hist = np.empty((max_steps, dimension+1), dtype=np.float64)
+        # batch update 中每个样本的 policy weight 更新量
+        self._n_upd = 0
+        self._upd_hist = np.empty((max_steps, dimension+1), dtype=np.float64)
         self.training_batch_acc = []
 
         self.testing_accuracy = []
         self.testing_acc_detail = []
 
+    # training records, as views of the filled part of the preallocated arrays
+    @property
+    def training_expected_acc_list(self) -> np.ndarray:
+        prob = self._prob[:self._t]
+        return np.where(self._label[:self._t] == 1, prob, 1 - prob)
+
+    @property
+    def training_error(self) -> np.ndarray:
+        return np.abs(self._prob[:self._t] - self._label[:self._t])
+
+    @property
+    def training_rewards(self) -> np.ndarray:
+        return self._rew[:self._t]
+
+    @property
+    def training_policy_weights(self) -> np.ndarray:
+        return self._pw_hist[:self._t]
+
+    @property
+    def training_single_policy_weight_update(self) -> np.ndarray:
+        return self._upd_hist[:self._n_upd]
+
+    @property
+    def training_acc_detail(self) -> list:
+        """Per-step records as dicts, rebuilt from the arrays on request."""
+        return [
+            {
+                'predicted_prob': prob,
+                'predicted_label': int(pred),
+                'true_label': label,
+                'expected_accuracy': correct_prob,
+                'reward': reward
+            }
+            for prob, pred, label, correct_prob, reward in zip(
+                self._prob[:self._t], self._pred[:self._t], self._label[:self._t],
+                self.training_expected_acc_list, self._rew[:self._t])
+        ]
+
+    def _reserve(self, n: int):
+        """Make room for n more training steps."""
+        if self._t + n > len(self._prob):
+            self._prob = _grow(self._prob, self._t + n)
+            self._pred = _grow(self._pred, self._t + n)
+            self._label = _grow(self._label, self._t + n)
+            self._rew = _grow(self._rew, self._t + n)
+            self._pw_hist = _grow(self._pw_hist, self._t + n)
+
     # policy function
     def get_action(self, obs: np.ndarray, stochastic=True) -> int:
-        logits = np.dot(self.previous_policy_weight, obs)
-        # prob = 1 / (1 + np.exp(-logits))
-        prob = expit(logits) # 相当于稳定的 1/(1+exp(-logits))
+        logits = float(np.dot(self.previous_policy_weight, obs))
+        # 标量输入直接用 math.exp，避免 ufunc 分派开销
+        prob = _sigmoid(logits)
         
         if stochastic:
-            action = np.random.binomial(n=1, p=prob)
+            action = int(self._rng.random() < prob)
         else:
             action = 1 if prob > default_predict_label_threshold else 0
 
         return prob, action
 
+    def get_actions(self, obs: np.ndarray, stochastic=True):
+        """Batched get_action for a (num_envs, dimension+1) observation matrix."""
+        probs = expit(obs @ self.previous_policy_weight)
+
+        if stochastic:
+            actions = (self._rng.random(len(probs)) < probs).astype(np.int8)
+        else:
+            actions = (probs > default_predict_label_threshold).astype(np.int8)
+
+        return probs, actions
+
     def batch_update(self):
-        if len(self.buffer) < self.buffer_size:
+        if self.buffer_len < self.buffer_size:
             return
 
+        # no shuffle: _run_batch uses the weights at the start of the batch for every sample,
+        # so the order does not change the update; the buffers are passed without copying
+        flags = self.buf_flags
+        self.update_batch(
+            self.buf_obs,
+            flags & 1,
+            self.buf_reward,
+            (flags >> 1) & 1,
+            self.buf_next_obs,
+            (flags >> 2) & 1,
+        )
+        self.buffer_len = 0
+
+    def update_batch(
+        self,
+        obs: np.ndarray,
+        actions: np.ndarray,
+        rewards: np.ndarray,
+        terminated: np.ndarray,
+        next_obs: np.ndarray,
+        true_labels: np.ndarray
+    ):
+        """
+        Actor-critic update on a whole batch of transitions at once.
+        obs / next_obs: (n, dimension+1); the other arguments: (n,).
+        TD errors and policy gradients are computed with the weights at the start of the batch;
+        the critic step is the sum of the per-sample steps, the actor step is averaged over the batch.
+        """
+        n = len(obs)
+        if n == 0:
+            return
         self.batch_update_count += 1
-        batch = list(self.buffer)
-        np.random.shuffle(batch)
-        accs = []  # 本次 batch 的准确率记录
-
-        for obs, action, reward, terminated, next_obs, true_label in batch:
-            # obs_with_bias = np.append(obs, 1.0)
-            q_input = np.append(obs, action)
-            q_value = np.dot(self.q_weights, q_input)
-
-            if not terminated and next_obs is not None:
-                # next_obs_with_bias = np.append(next_obs, 1.0)
-                q_next_0 = np.dot(self.q_weights, np.append(next_obs, 0))
-                q_next_1 = np.dot(self.q_weights, np.append(next_obs, 1))
-                max_q_next = max(q_next_0, q_next_1)
-            else:
-                max_q_next = 0.0
-
-            td_target = reward + self.discount_factor * max_q_next
-            td_error = td_target - q_value
-            td_error = np.clip(td_error, -clipVal_td, +clipVal_td)
-
-            self.q_weights += self.lr_c * td_error * q_input
-
-            logits = np.dot(self.previous_policy_weight, obs)
-            prob = 1 / (1 + np.exp(-logits))
-            grad_log_pi = (action - prob) * obs
-            # clip
-            grad_log_pi = np.clip(grad_log_pi, -clipVal_grad_log_pi, clipVal_grad_log_pi)
-            weight_update = (self.lr_a * td_error * grad_log_pi) / self.buffer_size
-            weight_update = np.clip(weight_update, -clipVal_policyWeight, +clipVal_policyWeight)
-
-            self.previous_policy_weight += weight_update
-
-            self.training_single_policy_weight_update.append(weight_update)
-
-            # 每步正确的概率(expected accuracy)
-            if true_label == 1:
-                correct_prob = prob
-            else:
-                correct_prob = 1 - prob
-            accs.append(correct_prob)
-
-        self.buffer.clear()
-        self.training_batch_acc.append(np.mean(accs))  # 记录当前 batch 平均 accuracy
+
+        # q_weights / previous_policy_weight are updated in place (env.policy_weight aliases the latter);
+        # the per-sample updates are written straight into the record array
+        self._upd_hist = _grow(self._upd_hist, self._n_upd + n)
+        weight_update = self._upd_hist[self._n_upd:self._n_upd + n]
+        batch_acc = _run_batch(
+            np.ascontiguousarray(obs, dtype=np.float64),
+            np.ascontiguousarray(actions, dtype=np.float64),
+            np.ascontiguousarray(rewards, dtype=np.float64),
+            np.ascontiguousarray(terminated, dtype=np.bool_),
+            np.ascontiguousarray(next_obs, dtype=np.float64),
+            np.ascontiguousarray(true_labels, dtype=np.float64),
+            self.q_weights,
+            self.previous_policy_weight,
+            self.lr_c,
+            self.lr_a,
+            self.discount_factor,
+            clipVal_td,
+            clipVal_grad_log_pi,
+            clipVal_policyWeight,
+            weight_update,
+        )
+
+        self._n_upd += n
+        self.training_batch_acc.append(batch_acc)  # 记录当前 batch 平均 accuracy
 
     def update(
         self,
@@ -146,33 +313,61 @@ class Principal_v5:
     ):
         true_label = info['true_label']
         next_obs = info.get('next_obs', None)
-        sample = (obs, action, reward, terminated, next_obs, true_label)
 
-        self.buffer.append(sample)  # 单一 buffer
+        # 单一 buffer，直接写入当前槽位
+        idx = self.write_head % self.buffer_size
+        self.buf_obs[idx] = obs
+        self.buf_reward[idx] = reward
+        # next_obs 为 None 时按终止处理
+        term = terminated or next_obs is None
+        if next_obs is None:
+            self.buf_next_obs[idx] = 0.0
+        else:
+            self.buf_next_obs[idx] = next_obs
+        self.buf_flags[idx] = int(action) | (int(term) << 1) | (int(true_label) << 2)
+        self.write_head += 1
+        self.buffer_len = min(self.buffer_len + 1, self.buffer_size)
 
-        if len(self.buffer) >= self.buffer_size:
+        if self.buffer_len >= self.buffer_size:
             self.batch_update()
 
+        # 记录单步结果 (expected accuracy / error 由 training_* 属性按需计算)
+        t = self._t
+        if t >= len(self._prob):
+            self._reserve(1)
+        self._prob[t] = prob
+        self._pred[t] = action
+        self._label[t] = true_label
+        self._rew[t] = reward
+        self._pw_hist[t] = self.previous_policy_weight
+        self._t = t + 1
+
+    def update_vector(
+        self,
+        obs: np.ndarray,
+        actions: np.ndarray,
+        rewards: np.ndarray,
+        info: dict,
+        probs: np.ndarray
+    ):
+        """
+        update() for one step of a vectorized env (e.g. VectorCreditScoring): the num_envs
+        transitions form the minibatch directly, without going through the replay buffer.
+        info must hold per-sample 'true_label', 'next_obs' and 'terminal' arrays.
+        """
+        true_labels = np.asarray(info['true_label'])
+        self.update_batch(obs, actions, rewards, info['terminal'], info['next_obs'], true_labels)
+
         # 记录单步结果
-        # 用确定性策略评估预测
-        pred = action
-        # 每步正确的概率
-        if true_label == 1:
-            correct_prob = prob
-        else:
-            correct_prob = 1 - prob
-        self.training_expected_acc_list.append(correct_prob)
-
-        self.training_error.append(abs(prob - info['true_label']))
-        self.training_rewards.append(reward)
-        self.training_policy_weights.append(self.previous_policy_weight.copy())
-        self.training_acc_detail.append({
-            'predicted_prob': prob,
-            'predicted_label': pred,
-            'true_label': info['true_label'],
-            'expected_accuracy': correct_prob,
-            'reward': reward
-        })
+        n = len(obs)
+        self._reserve(n)
+        t = self._t
+        self._prob[t:t + n] = probs
+        self._pred[t:t + n] = actions
+        self._label[t:t + n] = true_labels
+        self._rew[t:t + n] = rewards
+        self._pw_hist[t:t + n] = self.previous_policy_weight
+        self._t = t + n
 
     def test_result_record(self, action: int, info: dict, prob: float):
         """
@@ -1,11 +1,16 @@
 """Loading data from file"""
 """Modified based on performative_prediction_based/data_prep.py"""
 
+import json
+import os
 import pandas as pd
 import numpy as np
-from sklearn import preprocessing
 from collections import Counter
 
+# version of the arrays produced by load_data; stored in the load_cached manifest,
+# so bump it whenever load_data changes its output (standardization, balancing, shuffle)
+LOAD_DATA_VERSION = 1
+
 
 def load_data(file_loc, seed=None):
     """Load data from cvs file.
@@ -24,37 +29,89 @@ def load_data(file_loc, seed=None):
             raw data     
     """
 
-    data = pd.read_csv(file_loc, index_col=0)
+    data = pd.read_csv(file_loc, index_col=0, engine="c")
     data.dropna(inplace=True)
 
     # full data set
-    X_all = data.drop('SeriousDlqin2yrs', axis=1)
+    X_all = data.drop('SeriousDlqin2yrs', axis=1).to_numpy(dtype=np.float64)
+    n_samples, n_features = X_all.shape
 
-    # zero mean, unit variance
-    X_all = preprocessing.scale(X_all)
+    # zero mean, unit variance (same as preprocessing.scale), written straight
+    # into the final buffer next to the bias term
+    mean = X_all.mean(axis=0)
+    std = X_all.std(axis=0)
+    std[std == 0.0] = 1.0
+    X_bias = np.empty((n_samples, n_features + 1), dtype=np.float64)
+    features = X_bias[:, :n_features]
+    np.subtract(X_all, mean, out=features)
+    features /= std
 
     # add bias term
-    X_all = np.append(X_all, np.ones((X_all.shape[0], 1)), axis=1)
+    X_bias[:, n_features].fill(1.0)
 
     # outcomes
-    Y_all = np.array(data['SeriousDlqin2yrs'])
-
-    # balance classes
-    default_indices = np.where(Y_all == 1)[0]
-    other_indices = np.where(Y_all == 0)[0][:10000]
-    indices = np.concatenate((default_indices, other_indices))
+    Y_all = data['SeriousDlqin2yrs'].to_numpy()
 
-    X_balanced = X_all[indices]
-    Y_balanced = Y_all[indices]
+    # balance classes: all defaults + the first 10000 others
+    default_mask = Y_all == 1
+    n_default = np.count_nonzero(default_mask)
+    other_indices = np.flatnonzero(Y_all == 0)[:10000]
+    indices = np.empty(n_default + len(other_indices), dtype=np.intp)
+    indices[:n_default] = np.flatnonzero(default_mask)
+    indices[n_default:] = other_indices
 
     # shuffle arrays
-    if seed is not None:
-        np.random.seed(seed)
-    p = np.random.permutation(len(indices))
-    X_full = X_balanced[p]
-    Y_full = Y_balanced[p]
+    p = np.random.default_rng(seed).permutation(indices)
+    X_full = X_bias[p]
+    Y_full = Y_all[p]
     return X_full, Y_full, data
 
+
+def load_cached(cache_dir, key, names, sources, build, params=None):
+    """Load arrays from a .npy cache, rebuilding it when the sources change.
+
+    Parameters
+    ----------
+        cache_dir: string
+            directory holding '<key>_<name>.npy' files and '<key>_manifest.json'
+        key: string
+            prefix of the cached files
+        names: tuple of string
+            one name per array returned by `build`
+        sources: list of string
+            files the arrays are derived from; their mtimes are stored in the manifest
+        build: callable
+            returns the arrays (in the order of `names`) when the cache is missing or stale
+        params: dict
+            extra JSON-serializable values the arrays depend on (e.g. seed, loader version).
+            The code of `build` is not checked: include a version that is bumped when it changes.
+    Returns
+    -------
+        arrays: tuple of np.array
+            in-memory arrays (loaded from the cache when it is fresh)
+    """
+    manifest_path = os.path.join(cache_dir, f"{key}_manifest.json")
+    array_paths = [os.path.join(cache_dir, f"{key}_{name}.npy") for name in names]
+    manifest = {
+        'sources': {src: os.path.getmtime(src) for src in sources},
+        'params': params or {},
+    }
+
+    if os.path.exists(manifest_path) and all(os.path.exists(path) for path in array_paths):
+        with open(manifest_path) as f:
+            if json.load(f) == manifest:
+                # 不用 mmap_mode: np.memmap 的逐样本索引比普通 ndarray 慢得多
+                return tuple(np.load(path) for path in array_paths)
+
+    arrays = tuple(build())
+    os.makedirs(cache_dir, exist_ok=True)
+    for path, arr in zip(array_paths, arrays):
+        np.save(path, arr)
+    # write the manifest last so a partial write is never taken as fresh
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+    return arrays
+
 if __name__ == "__main__":
     X, Y, data = load_data("data/GiveMeSomeCredit/cs-training.csv")
     print("X shape:", X.shape)